@@ -1,16 +1,141 @@
 """API authentication and authorization."""
 
+import asyncio
+import hashlib
 import logging
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, Header
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.database import get_db
-from api.repositories import UserRepository, APIKeyRepository
+from api.repositories import UserRepository, APIKeyRepository, _pending_last_used
 from api.models import User, APIKey
 
 logger = logging.getLogger(__name__)
 
+# In-process cache for verified API keys: sha256(api_key) -> (user, key_record).
+# Serves repeat authentications without the two DB round-trips (verify_key +
+# get_by_id). Keyed by digest so the raw secret is never retained in memory.
+_key_cache: TTLCache = TTLCache(maxsize=10_000, ttl=300)
+
+# Per-key locks so concurrent requests with the same (uncached) key don't
+# all stampede the database at once.
+_key_locks: Dict[bytes, asyncio.Lock] = {}
+
+
+def _extract_bearer(authorization: str) -> str:
+    """
+    Extract the token from a "Bearer <token>" Authorization header.
+
+    Uses str.partition instead of split() to avoid a list allocation on
+    the hot path, and only lowercases the scheme.
+    """
+    scheme, sep, token = authorization.partition(" ")
+    if not sep or not token or scheme.lower() != "bearer" or " " in token:
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid Authorization header format. Expected: Bearer <token>"
+        )
+    return token
+
+
+def _key_expired(key_record: APIKey) -> bool:
+    """Whether a cached key record is past its expires_at."""
+    return bool(
+        key_record.expires_at
+        and key_record.expires_at < datetime.now(timezone.utc)
+    )
+
+
+def _api_key_cache_key(api_key: str) -> bytes:
+    """Derive the cache key for an API key (SHA-256 digest of the secret)."""
+    return hashlib.sha256(api_key.encode()).digest()
+
+
+def invalidate_api_key_cache(key_id: str) -> None:
+    """
+    Evict cached entries for a revoked/deleted API key.
+
+    Called by APIKeyRepository on mutations so stale credentials don't keep
+    authenticating until the TTL expires.
+    """
+    for cache_key, (_, key_record) in list(_key_cache.items()):
+        if key_record.key_id == key_id:
+            _key_cache.pop(cache_key, None)
+
+
+async def _verify_api_key_cached(
+    api_key: str,
+    db: AsyncSession
+) -> Optional[Tuple[User, APIKey]]:
+    """
+    Verify an API key, serving repeat lookups from the in-process cache.
+
+    Returns (user, key_record) if the key is valid, None otherwise.
+    """
+    cache_key = _api_key_cache_key(api_key)
+
+    cached = _key_cache.get(cache_key)
+    if cached is not None:
+        # Expiry is re-checked on every hit: the TTL bounds staleness of
+        # revocations, but a key must stop working at expires_at exactly
+        if _key_expired(cached[1]):
+            _key_cache.pop(cache_key, None)
+            return None
+        # Cache hits still count as key usage; the background flush
+        # writes the debounced timestamp
+        _pending_last_used[cached[1].key_id] = datetime.now(timezone.utc)
+        return cached
+
+    lock = _key_locks.setdefault(cache_key, asyncio.Lock())
+    try:
+        async with lock:
+            # Another request may have verified this key while we waited
+            cached = _key_cache.get(cache_key)
+            if cached is not None:
+                if _key_expired(cached[1]):
+                    _key_cache.pop(cache_key, None)
+                    return None
+                _pending_last_used[cached[1].key_id] = datetime.now(timezone.utc)
+                return cached
+
+            # Single round trip: the key's owner is joined into the same query
+            api_key_repo = APIKeyRepository(db)
+            verified = await api_key_repo.verify_key_with_user(api_key)
+
+            if not verified:
+                return None
+
+            key_record, user = verified
+            _key_cache[cache_key] = (user, key_record)
+            return (user, key_record)
+    finally:
+        _key_locks.pop(cache_key, None)
+
+
+async def _try_authenticate(
+    authorization: Optional[str],
+    db: AsyncSession
+) -> Optional[User]:
+    """
+    Authenticate via API key, returning None instead of raising.
+
+    Lets optional-auth endpoints skip the HTTPException construct/catch
+    cost on every unauthenticated request.
+    """
+    if not authorization:
+        return None
+
+    scheme, sep, token = authorization.partition(" ")
+    if not sep or not token or scheme.lower() != "bearer" or " " in token:
+        return None
+
+    result = await _verify_api_key_cached(token, db)
+    return result[0] if result else None
+
 
 async def get_current_user_from_api_key(
     authorization: Optional[str] = Header(None),
@@ -27,36 +152,18 @@ async def get_current_user_from_api_key(
             detail="Missing Authorization header"
         )
 
-    # Parse Bearer token
-    parts = authorization.split()
-    if len(parts) != 2 or parts[0].lower() != "bearer":
-        raise HTTPException(
-            status_code=401,
-            detail="Invalid Authorization header format. Expected: Bearer <api_key>"
-        )
+    api_key = _extract_bearer(authorization)
 
-    api_key = parts[1]
+    # Verify API key (cached for repeat requests)
+    result = await _verify_api_key_cached(api_key, db)
 
-    # Verify API key
-    api_key_repo = APIKeyRepository(db)
-    key_record = await api_key_repo.verify_key(api_key)
-
-    if not key_record:
+    if not result:
         raise HTTPException(
             status_code=401,
             detail="Invalid or inactive API key"
         )
 
-    # Get user
-    user_repo = UserRepository(db)
-    user = await user_repo.get_by_id(key_record.user_id)
-
-    if not user:
-        raise HTTPException(
-            status_code=401,
-            detail="User not found"
-        )
-
+    user, _ = result
     return user
 
 
@@ -74,31 +181,25 @@ async def get_api_key_from_header(
             detail="Missing Authorization header"
         )
 
-    parts = authorization.split()
-    if len(parts) != 2 or parts[0].lower() != "bearer":
-        raise HTTPException(
-            status_code=401,
-            detail="Invalid Authorization header format"
-        )
-
-    api_key = parts[1]
+    api_key = _extract_bearer(authorization)
 
-    api_key_repo = APIKeyRepository(db)
-    key_record = await api_key_repo.verify_key(api_key)
+    result = await _verify_api_key_cached(api_key, db)
 
-    if not key_record:
+    if not result:
         raise HTTPException(
             status_code=401,
             detail="Invalid or inactive API key"
         )
 
+    _, key_record = result
     return key_record
 
 
 # JWT-based auth for dashboard
 import os
+import time
+import httpx
 import jwt
-import requests
 from jose import JWTError
 from jose.backends import RSAKey
 
@@ -110,28 +211,88 @@ COGNITO_CLIENT_ID = os.getenv("COGNITO_CLIENT_ID", "6fpc4jp30rfl1ojrvmt3r1qbgs")
 # Cognito public keys URL
 COGNITO_JWKS_URL = f"https://cognito-idp.{COGNITO_REGION}.amazonaws.com/{COGNITO_USER_POOL_ID}/.well-known/jwks.json"
 
-# Cache for Cognito public keys
-_cognito_keys_cache = None
+# Constants for token verification, hoisted so the decode path doesn't
+# rebuild the issuer string and options dict on every request
+_ISSUER = f"https://cognito-idp.{COGNITO_REGION}.amazonaws.com/{COGNITO_USER_POOL_ID}"
+_JWT_OPTIONS = {'verify_at_hash': False}  # We only use ID tokens, no at_hash
+
+# Cache for Cognito public keys: (fetched_at, jwks). Refreshed after the TTL
+# so key rotation is picked up without refetching on every request.
+_JWKS_TTL_SECONDS = 3600
+_jwks_cache: Optional[Tuple[float, dict]] = None
+_jwks_lock = asyncio.Lock()
+
+# Shared async HTTP client so JWKS fetches don't block the event loop
+_http_client = httpx.AsyncClient(timeout=5.0)
 
-def get_cognito_public_keys():
+async def close_http_client() -> None:
+    """Close the shared HTTP client (called from the app lifespan)."""
+    await _http_client.aclose()
+
+
+# Memoized successful JWT verifications: sha256(token) -> (user_id, exp).
+# Skips the RS256 signature check on repeat requests with the same token;
+# staleness is bounded by the TTL and the token's own expiry.
+_jwt_cache: TTLCache = TTLCache(maxsize=5000, ttl=300)
+
+# Short-lived cache of authenticated User rows keyed by user_id, so
+# back-to-back JWT requests skip the per-request SELECT. Profile updates
+# invalidate explicitly; the TTL bounds any other staleness.
+_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+
+
+def invalidate_user_cache(user_id: str) -> None:
+    """Evict cached User rows after a profile mutation.
+
+    The user is cached in two places: the JWT-path _user_cache keyed by
+    user_id, and the API-key-path _key_cache where the entry carries the
+    User alongside the key record — evict both so neither auth path
+    serves the pre-update profile.
     """
-    Fetch and cache Cognito public keys for JWT verification.
+    _user_cache.pop(user_id, None)
+    for cache_key, (user, _) in list(_key_cache.items()):
+        if user.user_id == user_id:
+            _key_cache.pop(cache_key, None)
+
+
+async def get_cognito_public_keys() -> dict:
     """
-    global _cognito_keys_cache
+    Fetch and cache Cognito public keys for JWT verification.
 
-    if _cognito_keys_cache is not None:
-        return _cognito_keys_cache
+    Concurrent refreshes are coalesced behind a lock so only one request
+    pays the network round trip. The cached JWKS carries prebuilt
+    signer objects so token verification is an O(1) lookup.
+    """
+    global _jwks_cache
+
+    cached = _jwks_cache
+    if cached is not None and time.monotonic() - cached[0] < _JWKS_TTL_SECONDS:
+        return cached[1]
+
+    async with _jwks_lock:
+        # Another request may have refreshed while we waited for the lock
+        cached = _jwks_cache
+        if cached is not None and time.monotonic() - cached[0] < _JWKS_TTL_SECONDS:
+            return cached[1]
+
+        try:
+            response = await _http_client.get(COGNITO_JWKS_URL)
+            response.raise_for_status()
+            jwks = response.json()
+        except Exception as e:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Failed to fetch Cognito public keys: {str(e)}"
+            )
 
-    try:
-        response = requests.get(COGNITO_JWKS_URL, timeout=5)
-        response.raise_for_status()
-        _cognito_keys_cache = response.json()
-        return _cognito_keys_cache
-    except Exception as e:
-        raise HTTPException(
-            status_code=503,
-            detail=f"Failed to fetch Cognito public keys: {str(e)}"
-        )
+        # Construct RSA key objects once at cache-fill time so the decode
+        # path skips the per-request JWK -> RSA key build (base64url decode
+        # of n/e plus cryptography key construction).
+        jwks["signers"] = {
+            k["kid"]: RSAKey(k, "RS256") for k in jwks.get("keys", [])
+        }
+        _jwks_cache = (time.monotonic(), jwks)
+        return jwks
 
 
 async def get_current_user_from_jwt(
@@ -142,7 +303,7 @@ async def get_current_user_from_jwt(
     Authenticate user via Cognito JWT token.
     Verifies token signature, expiration, and extracts user info.
     """
-    logger.info("JWT authentication started")
+    logger.debug("JWT authentication started")
 
     if not authorization:
         logger.warning("Missing Authorization header")
@@ -151,88 +312,87 @@ async def get_current_user_from_jwt(
             detail="Missing Authorization header"
         )
 
-    # Parse Bearer token
-    parts = authorization.split()
-    if len(parts) != 2 or parts[0].lower() != "bearer":
-        logger.warning(f"Invalid Authorization header format: {len(parts)} parts, first part: {parts[0] if parts else 'none'}")
-        raise HTTPException(
-            status_code=401,
-            detail="Invalid Authorization header format. Expected: Bearer <jwt_token>"
-        )
-
-    token = parts[1]
-    logger.info(f"Token received (length: {len(token)}, prefix: {token[:20]}...)")
+    token = _extract_bearer(authorization)
+    logger.debug("Token received (length: %d)", len(token))
+
+    # Serve repeat requests with the same token from the verification cache
+    token_key = hashlib.sha256(token.encode()).digest()
+    cached = _jwt_cache.get(token_key)
+    if cached is not None:
+        user_id, exp = cached
+        if exp > time.time():
+            user = _user_cache.get(user_id)
+            if user is not None:
+                return user
+            user_repo = UserRepository(db)
+            user = await user_repo.get_by_id(user_id)
+            if user:
+                _user_cache[user_id] = user
+                return user
+        _jwt_cache.pop(token_key, None)
 
     try:
         from jose import jwt as jose_jwt
 
         # Get Cognito public keys
-        logger.info("Fetching Cognito public keys")
-        keys = get_cognito_public_keys()
-        logger.info(f"Retrieved {len(keys.get('keys', []))} public keys from Cognito")
+        keys = await get_cognito_public_keys()
+        logger.debug("Retrieved %d public keys from Cognito", len(keys.get('keys', [])))
 
         # Decode header to get key ID
-        logger.info("Decoding JWT header")
         headers = jose_jwt.get_unverified_header(token)
         kid = headers.get('kid')
-        logger.info(f"Token kid: {kid}")
+        logger.debug("Token kid: %s", kid)
 
         if not kid:
             logger.error("Token missing 'kid' header")
             raise HTTPException(status_code=401, detail="Token missing 'kid' header")
 
-        # Find the matching public key
-        key = None
-        for k in keys.get('keys', []):
-            if k['kid'] == kid:
-                key = k
-                break
+        # Find the matching signer (prebuilt at cache fill, no linear scan
+        # and no per-request RSA key construction)
+        key = keys['signers'].get(kid)
 
         if not key:
             logger.error(f"Public key not found for kid: {kid}")
             raise HTTPException(status_code=401, detail="Public key not found for token")
 
-        logger.info(f"Found matching public key for kid: {kid}")
-
         # Verify and decode token
-        logger.info("Verifying and decoding token")
-        logger.info(f"Cognito config - Region: {COGNITO_REGION}, Pool: {COGNITO_USER_POOL_ID}, Client: {COGNITO_CLIENT_ID}")
-
         claims = jose_jwt.decode(
             token,
             key,
             algorithms=['RS256'],
             audience=COGNITO_CLIENT_ID,
-            issuer=f'https://cognito-idp.{COGNITO_REGION}.amazonaws.com/{COGNITO_USER_POOL_ID}',
-            options={'verify_at_hash': False}  # Skip at_hash validation since we only use ID token
+            issuer=_ISSUER,
+            options=_JWT_OPTIONS
         )
-        logger.info(f"Token successfully decoded. Claims: {list(claims.keys())}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Token successfully decoded. Claims: %s", list(claims.keys()))
 
         # Extract user info from token
         cognito_username = claims.get('cognito:username')
         email = claims.get('email')
-        logger.info(f"Extracted user info - username: {cognito_username}, email: {email}")
+        logger.debug("Extracted user info - username: %s, email: %s", cognito_username, email)
 
         if not cognito_username:
             logger.error("Token missing cognito:username claim")
             raise HTTPException(status_code=401, detail="Token missing cognito:username")
 
         # Get or create user in database
-        logger.info(f"Looking up user in database: {cognito_username}")
         user_repo = UserRepository(db)
         user = await user_repo.get_by_cognito_username(cognito_username)
 
         if not user:
-            logger.info(f"User not found, creating new user: {cognito_username}")
             # Auto-create user from Cognito token (first login)
             user = await user_repo.create_from_cognito(
                 cognito_username=cognito_username,
                 email=email or f"{cognito_username}@unknown.local",
                 namespace=f"@{cognito_username}"
             )
-            logger.info(f"Created new user with ID: {user.user_id}")
-        else:
-            logger.info(f"Found existing user with ID: {user.user_id}")
+            logger.info("Created new user from Cognito login: %s", user.user_id)
+
+        # Token cache holds only the user_id; the row itself goes in the
+        # short-TTL user cache (safe to detach: expire_on_commit=False)
+        _jwt_cache[token_key] = (user.user_id, claims.get('exp', 0))
+        _user_cache[user.user_id] = user
 
         return user
 
@@ -269,11 +429,5 @@ async def optional_verify_api_key(
     """
     Optional authentication that returns namespace or None.
     """
-    if not authorization:
-        return None
-
-    try:
-        user = await get_current_user_from_api_key(authorization, db)
-        return user.namespace
-    except HTTPException:
-        return None
+    user = await _try_authenticate(authorization, db)
+    return user.namespace if user else None
@@ -2,7 +2,7 @@
 import os
 from typing import AsyncGenerator
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 # Get database URL from environment
 # Supports two modes:
@@ -26,10 +26,24 @@ if not DATABASE_URL:
 # Create async engine
 engine = create_async_engine(
     DATABASE_URL,
-    echo=True if os.getenv("DEBUG", "false").lower() == "true" else False,
-    pool_pre_ping=True,  # Verify connections before using
-    pool_size=10,  # Base connection pool size
-    max_overflow=20,  # Max additional connections
+    # Explicit: the sync QueuePool deadlocks under asyncio if it ever
+    # gets selected, so don't rely on the implicit default
+    poolclass=AsyncAdaptedQueuePool,
+    # SQL_ECHO is deliberately narrower than DEBUG: per-statement logging
+    # devastates throughput if left on in production
+    echo=os.getenv("SQL_ECHO") == "1",
+    connect_args={
+        # Reuse parsed query plans across requests
+        "statement_cache_size": 1024,
+        # Avoid per-connection LLVM JIT warm-up on RDS
+        "server_settings": {"jit": "off"},
+    },
+    pool_recycle=1800,  # Refresh connections on a timer instead of pre-ping
+    pool_timeout=10,  # Max seconds to wait for a pooled connection
+    # Pool sizing is env-tunable; keep
+    # (pool_size + max_overflow) * num_workers <= RDS max_connections
+    pool_size=int(os.getenv("DB_POOL_SIZE", "20")),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "40")),
 )
 
 # Create session factory
@@ -5,38 +5,155 @@ Provides HTTP endpoints for Golden Path registry operations.
 Designed to be called by stdio MCP clients.
 """
 
+import asyncio
 import logging
+import os
+import sys
+import time
 from fastapi import FastAPI, HTTPException, Depends, File, UploadFile, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from fastapi_cache.decorator import cache
 from botocore.exceptions import ClientError
 from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from .auth import verify_api_key, optional_verify_api_key
+from .auth import verify_api_key, optional_verify_api_key, close_http_client
 from .registry import GoldenPathRegistry
-from .database import engine
+from .repositories import GoldenPathMetadataRepository, UserRepository, flush_last_used
+from .schemas import BatchFetchRequest
+from .database import engine, get_db, AsyncSessionLocal
 from .routers import users, api_keys, profile
 from contextlib import asynccontextmanager
 
 # Configure logging with JSON format for structured analytics
-import json
+import orjson
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
-def log_analytics(event: str, data: dict):
-    """Log analytics event with structured data."""
-    logger.info(f"ANALYTICS: {json.dumps({'event': event, **data})}")
+# Analytics events are queued and written by a background task so request
+# handlers never serialize JSON or contend on the logging lock inline.
+_analytics_queue: asyncio.Queue = asyncio.Queue(maxsize=10_000)
+_ANALYTICS_BATCH_MAX = 1000
+_ANALYTICS_FLUSH_SECONDS = 10.0
+
+
+def log_analytics(request: Request, event: str, data: dict):
+    """Queue an analytics event for the background writer (non-blocking).
+
+    The visitor/client headers are resolved once per request and cached
+    on request.state; Starlette header lookups are case-insensitive
+    scans, so call sites shouldn't repeat them.
+    """
+    ctx = getattr(request.state, "analytics_ctx", None)
+    if ctx is None:
+        ctx = request.state.analytics_ctx = {
+            'visitor_id': request.headers.get('x-visitor-id', 'anonymous'),
+            'client_version': request.headers.get('x-client-version', 'unknown'),
+        }
+    try:
+        # Stamp at enqueue time — the writer may flush seconds later
+        _analytics_queue.put_nowait({'ts': time.time(), 'event': event, **ctx, **data})
+    except asyncio.QueueFull:
+        # Shed analytics rather than request latency
+        pass
+
+
+def _flush_analytics_batch(batch: list) -> None:
+    """Write a batch of events as one buffered stdout write."""
+    sys.stdout.buffer.write(
+        b''.join(b'ANALYTICS: ' + orjson.dumps(e) + b'\n' for e in batch)
+    )
+    sys.stdout.buffer.flush()
+
+
+async def _drain_analytics():
+    """
+    Background task: flush queued analytics events in batches.
+
+    One syscall per batch instead of one log write per event; the short
+    wait after the first event lets bursts coalesce. Events still come
+    out one line each for downstream parsers.
+    """
+    while True:
+        batch = [await _analytics_queue.get()]
+        try:
+            # Coalesce bursts, but only wait when we're keeping up:
+            # with a full batch already queued, flush back-to-back so
+            # sustained load isn't capped at one batch per interval
+            if _analytics_queue.qsize() < _ANALYTICS_BATCH_MAX:
+                await asyncio.sleep(_ANALYTICS_FLUSH_SECONDS)
+        finally:
+            # Drain whatever accumulated (and flush on cancellation so
+            # shutdown doesn't drop queued events)
+            while len(batch) < _ANALYTICS_BATCH_MAX:
+                try:
+                    batch.append(_analytics_queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            _flush_analytics_batch(batch)
+
+_LAST_USED_FLUSH_SECONDS = 30
+
+
+async def _flush_last_used_loop():
+    """Background task: batch-write debounced API-key last_used updates."""
+    while True:
+        await asyncio.sleep(_LAST_USED_FLUSH_SECONDS)
+        try:
+            async with AsyncSessionLocal() as db:
+                await flush_last_used(db)
+        except Exception:
+            logger.exception("last_used flush failed")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown logic."""
     logger.info("Starting Golden Path API")
     # Database connection is already handled by get_db() dependency
+
+    # Construct the registry here (not at import) so its async S3 client
+    # lives and dies with the app; endpoints reach it via get_registry
+    registry = GoldenPathRegistry()
+    await registry.start()
+    app.state.registry = registry
+
+    # Background writer for queued analytics events
+    analytics_task = asyncio.create_task(_drain_analytics())
+
+    # Debounced API-key last_used flusher
+    last_used_task = asyncio.create_task(_flush_last_used_loop())
+
+    # Response cache for read endpoints: Redis (ElastiCache) when
+    # REDIS_URL is configured, in-process memory otherwise
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        from redis import asyncio as aioredis
+        from fastapi_cache.backends.redis import RedisBackend
+        FastAPICache.init(RedisBackend(aioredis.from_url(redis_url)), prefix="gp")
+    else:
+        FastAPICache.init(InMemoryBackend(), prefix="gp")
+
     yield
     logger.info("Shutting down Golden Path API")
+    analytics_task.cancel()
+    last_used_task.cancel()
+    # Final flush so timestamps recorded since the last tick aren't lost
+    try:
+        async with AsyncSessionLocal() as db:
+            await flush_last_used(db)
+    except Exception:
+        logger.exception("final last_used flush failed")
+    await app.state.registry.close()
+    await close_http_client()
     await engine.dispose()
 
 # Initialize FastAPI app
@@ -44,20 +161,59 @@ app = FastAPI(
     title="Golden Path Registry API",
     description="REST API for Golden Path storage and retrieval",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse  # orjson: faster JSON encoding
 )
 
-# CORS middleware for web clients
+class LivenessMiddleware:
+    """
+    Answer /health before the rest of the stack runs.
+
+    Load balancers probe liveness every few seconds per replica; this
+    skips CORS, routing, and dependency resolution for those requests.
+    The DB-touching readiness probe lives at /ready.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == "/health":
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/json")],
+            })
+            await send({"type": "http.response.body", "body": b'{"status":"ok"}'})
+            return
+        await self.app(scope, receive, send)
+
+
+# Compress large JSON responses (list/search payloads compress 5-10x).
+# Added before CORS so gzip runs innermost.
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# CORS middleware for web clients: regex allowlist covering goldenpath.dev
+# subdomains, narrowed methods/headers, and a long preflight max_age so
+# browsers stop re-sending OPTIONS for every request
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # TODO: Restrict in production
+    allow_origin_regex=os.getenv(
+        "CORS_ORIGIN_REGEX", r"https://(.*\.)?goldenpath\.dev$"
+    ),
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE"],
+    allow_headers=["authorization", "x-visitor-id", "x-client-version"],
+    max_age=86400,
 )
 
-# Initialize registry
-registry = GoldenPathRegistry()
+# Outermost: liveness probes never reach the router
+app.add_middleware(LivenessMiddleware)
+
+def get_registry(request: Request) -> GoldenPathRegistry:
+    """Dependency: the lifespan-managed S3 registry (see lifespan)."""
+    return request.app.state.registry
+
 
 # Include routers
 # IMPORTANT: More specific routes must be registered BEFORE less specific routes
@@ -68,10 +224,13 @@ app.include_router(profile.router)     # /api/v1/users/me (more specific)
 app.include_router(users.router)       # /api/v1/users (least specific)
 
 
-@app.get("/health")
-async def health_check():
+@app.get("/ready")
+async def readiness_check():
     """
-    Health check endpoint with database connectivity test.
+    Readiness check endpoint with database connectivity test.
+
+    Liveness (/health) is answered by LivenessMiddleware without
+    touching the database; point deep health checks here.
 
     Returns:
         - status: "ok" if all checks pass, "degraded" if database fails
@@ -104,7 +263,9 @@ async def create_golden_path(
     file: UploadFile = File(...),
     name: str = Form(...),
     version: str = Form("0.0.1"),
-    namespace: str = Depends(verify_api_key)
+    namespace: str = Depends(verify_api_key),
+    db: AsyncSession = Depends(get_db),
+    registry: GoldenPathRegistry = Depends(get_registry)
 ):
     """
     Upload a Golden Path to the registry.
@@ -119,27 +280,36 @@ async def create_golden_path(
         Upload confirmation with registry location
     """
     # Log analytics
-    log_analytics("create", {
-        "visitor_id": request.headers.get("x-visitor-id", "anonymous"),
-        "client_version": request.headers.get("x-client-version", "unknown"),
+    log_analytics(request, "create", {
         "namespace": namespace,
         "name": name,
         "version": version
     })
 
-    # Read file content
-    content = await file.read()
-
-    # Upload to S3
-    result = registry.create_path(namespace, name, version, content)
+    # Hand Starlette's spooled upload to the registry, which gzips it
+    # chunk-by-chunk into another spool before the S3 put — no full
+    # read into memory at any point
+    result = await registry.create_path(namespace, name, version, file.file)
 
     if not result.get("success"):
         raise HTTPException(status_code=400, detail=result.get("error"))
 
+    # Record searchable metadata (S3 stays the source of truth for content)
+    owner = await UserRepository(db).get_by_namespace(namespace)
+    await GoldenPathMetadataRepository(db).upsert(
+        namespace, name, version,
+        owner_user_id=owner.user_id if owner else None
+    )
+
+    # Write-through invalidation: drop cached reads that may include this path
+    await FastAPICache.clear(namespace="fetch")
+    await FastAPICache.clear(namespace="list")
+
     return result
 
 
 @app.get("/api/v1/golden-paths/{namespace}/{name}")
+@cache(expire=60, namespace="fetch")
 async def fetch_golden_path(
     request: Request,
     namespace: str,
@@ -160,15 +330,17 @@ async def fetch_golden_path(
         Golden Path content and metadata
     """
     # Log analytics
-    log_analytics("fetch", {
-        "visitor_id": request.headers.get("x-visitor-id", "anonymous"),
-        "client_version": request.headers.get("x-client-version", "unknown"),
+    log_analytics(request, "fetch", {
         "path": f"{namespace}/{name}:{version}",
         "authenticated": user_namespace is not None
     })
 
+    # Read off app.state rather than Depends: an object-valued dependency
+    # would be folded into this endpoint's response-cache key
+    registry = request.app.state.registry
+
     try:
-        result = registry.fetch_path(namespace, name, version)
+        result = await registry.fetch_path(namespace, name, version)
         return result
 
     except ClientError as e:
@@ -181,6 +353,7 @@ async def fetch_golden_path(
 
 
 @app.get("/api/v1/golden-paths")
+@cache(expire=30, namespace="list")
 async def list_golden_paths(
     request: Request,
     namespace: str = None,
@@ -212,9 +385,7 @@ async def list_golden_paths(
         sort_by = "name"
 
     # Log analytics
-    log_analytics("list", {
-        "visitor_id": request.headers.get("x-visitor-id", "anonymous"),
-        "client_version": request.headers.get("x-client-version", "unknown"),
+    log_analytics(request, "list", {
         "namespace": namespace,
         "page": page,
         "per_page": per_page,
@@ -223,21 +394,27 @@ async def list_golden_paths(
     })
 
     try:
-        # Get all matching paths
-        all_paths = registry.list_paths(namespace)
-
-        # Sort paths
-        reverse = sort_by == "last_modified"  # Newest first for timestamps
-        all_paths.sort(key=lambda x: x.get(sort_by, ""), reverse=reverse)
+        # Sorting and pagination run in the database; only the requested
+        # page is materialized. Session is opened here rather than via
+        # Depends so the response cache key doesn't vary per session object.
+        async with AsyncSessionLocal() as db:
+            rows, total_count = await GoldenPathMetadataRepository(db).list_paths(
+                namespace,
+                sort_by=sort_by,
+                limit=per_page,
+                offset=(page - 1) * per_page,
+            )
+        paths = [
+            {
+                "namespace": row.namespace,
+                "name": row.name,
+                "version": row.version,
+                "last_modified": row.updated_at.isoformat() if row.updated_at else None
+            }
+            for row in rows
+        ]
 
-        # Calculate pagination
-        total_count = len(all_paths)
         total_pages = (total_count + per_page - 1) // per_page  # Ceiling division
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-
-        # Paginate
-        paths = all_paths[start_idx:end_idx]
 
         return {
             "paths": paths,
@@ -253,15 +430,76 @@ async def list_golden_paths(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/v1/golden-paths:batch")
+async def batch_fetch_golden_paths(
+    request: Request,
+    body: BatchFetchRequest,
+    user_namespace: str | None = Depends(optional_verify_api_key),
+    registry: GoldenPathRegistry = Depends(get_registry)
+):
+    """
+    Fetch multiple Golden Paths in one request.
+
+    Amortizes per-request overhead for clients syncing many paths: one
+    HTTP round trip to the API fans out into concurrent S3 fetches.
+
+    Args:
+        body: List of (namespace, name, version) references (max 128)
+        user_namespace: Authenticated user's namespace (optional)
+
+    Returns:
+        Results in request order; failed entries carry an "error" field
+    """
+    # Log analytics
+    log_analytics(request, "batch_fetch", {
+        "count": len(body.paths),
+        "authenticated": user_namespace is not None
+    })
+
+    # Cap fan-out below the S3 client's connection pool size
+    semaphore = asyncio.Semaphore(64)
+
+    async def _fetch_one(ref):
+        async with semaphore:
+            return await registry.fetch_path(ref.namespace, ref.name, ref.version)
+
+    results = await asyncio.gather(
+        *(_fetch_one(ref) for ref in body.paths),
+        return_exceptions=True
+    )
+
+    out = []
+    for ref, result in zip(body.paths, results):
+        if isinstance(result, BaseException):
+            not_found = (
+                isinstance(result, ClientError)
+                and result.response['Error']['Code'] == 'NoSuchKey'
+            )
+            out.append({
+                "namespace": ref.namespace,
+                "name": ref.name,
+                "version": ref.version,
+                "error": "not found" if not_found else str(result)
+            })
+        else:
+            out.append(result)
+
+    return {"results": out}
+
+
 @app.get("/api/v1/search")
 async def search_golden_paths(
     request: Request,
     q: str,
-    user_namespace: str | None = Depends(optional_verify_api_key)
+    user_namespace: str | None = Depends(optional_verify_api_key),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Search Golden Paths by query.
 
+    Runs against the indexed golden_paths_metadata table rather than
+    listing the whole S3 bucket per query.
+
     Args:
         q: Search query
         user_namespace: Authenticated user's namespace (optional)
@@ -270,19 +508,26 @@ async def search_golden_paths(
         List of matching Golden Paths
     """
     # Log analytics
-    log_analytics("search", {
-        "visitor_id": request.headers.get("x-visitor-id", "anonymous"),
-        "client_version": request.headers.get("x-client-version", "unknown"),
+    log_analytics(request, "search", {
         "query": q,
         "authenticated": user_namespace is not None
     })
 
-    try:
-        results = registry.search_paths(q)
-        return {"results": results}
-
-    except ClientError as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    matches = await GoldenPathMetadataRepository(db).search(q)
+
+    return {
+        "results": [
+            {
+                "namespace": m.namespace,
+                "name": m.name,
+                "version": m.version,
+                "description": m.description,
+                "downloads": m.download_count,
+                "last_modified": m.updated_at.isoformat() if m.updated_at else None
+            }
+            for m in matches
+        ]
+    }
 
 
 @app.delete("/api/v1/golden-paths/{namespace}/{name}")
@@ -291,7 +536,9 @@ async def delete_golden_path(
     namespace: str,
     name: str,
     version: str = "latest",
-    user_namespace: str = Depends(verify_api_key)
+    user_namespace: str = Depends(verify_api_key),
+    db: AsyncSession = Depends(get_db),
+    registry: GoldenPathRegistry = Depends(get_registry)
 ):
     """
     Delete a Golden Path from the registry.
@@ -306,9 +553,7 @@ async def delete_golden_path(
         Deletion confirmation
     """
     # Log analytics
-    log_analytics("delete", {
-        "visitor_id": request.headers.get("x-visitor-id", "anonymous"),
-        "client_version": request.headers.get("x-client-version", "unknown"),
+    log_analytics(request, "delete", {
         "path": f"{namespace}/{name}:{version}",
         "user_namespace": user_namespace
     })
@@ -320,19 +565,41 @@ async def delete_golden_path(
             detail=f"Not authorized to delete from namespace {namespace}"
         )
 
-    result = registry.delete_path(namespace, name, version)
+    result = await registry.delete_path(namespace, name, version)
 
     if not result.get("success"):
         raise HTTPException(status_code=500, detail=result.get("error"))
 
+    # Drop the metadata row so search stops returning the deleted path
+    await GoldenPathMetadataRepository(db).delete(namespace, name, version)
+
+    # Write-through invalidation: drop cached reads that may include this path
+    await FastAPICache.clear(namespace="fetch")
+    await FastAPICache.clear(namespace="list")
+
     return result
 
 
 # Error handlers
-@app.exception_handler(Exception)
-async def global_exception_handler(request, exc):
-    """Global exception handler."""
-    return JSONResponse(
-        status_code=500,
-        content={"error": "Internal server error", "detail": str(exc)}
+# Narrow handlers for the failure modes we actually expect; anything truly
+# unexpected falls through to Starlette's default 500 handler, which also
+# re-raises base exceptions (CancelledError, SystemExit) so task
+# cancellation and shutdown aren't swallowed.
+@app.exception_handler(ClientError)
+async def s3_exception_handler(request, exc):
+    """Surface uncaught S3 client errors as a bad-gateway response."""
+    logger.error(f"Unhandled S3 error: {str(exc)}")
+    return ORJSONResponse(
+        status_code=502,
+        content={"error": "Storage backend error", "detail": str(exc)}
+    )
+
+
+@app.exception_handler(SQLAlchemyError)
+async def db_exception_handler(request, exc):
+    """Surface uncaught database errors as service-unavailable."""
+    logger.error(f"Unhandled database error: {str(exc)}")
+    return ORJSONResponse(
+        status_code=503,
+        content={"error": "Database error", "detail": str(exc)}
     )
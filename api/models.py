@@ -1,5 +1,5 @@
 """Database models for Golden Path application."""
-from sqlalchemy import Column, String, Boolean, Integer, TIMESTAMP, ForeignKey, Index, Text
+from sqlalchemy import Column, String, Boolean, Integer, TIMESTAMP, ForeignKey, Index, Text, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
@@ -43,6 +43,7 @@ class APIKey(Base):
     user_id = Column(String(255), ForeignKey('users.user_id', ondelete='CASCADE'), nullable=False, comment="Owner user ID")
     name = Column(String(255), nullable=False, comment="Human-readable key name")
     key_hash = Column(String(255), unique=True, nullable=False, comment="bcrypt hash of API key")
+    key_lookup_hash = Column(String(64), comment="HMAC-SHA256 of API key for indexed lookup (null on legacy keys)")
     key_prefix = Column(String(20), nullable=False, comment="Key prefix for display (gp_live_xxx...)")
     scopes = Column(JSONB, default=["read", "write"], nullable=False, comment="Permission scopes")
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
@@ -53,6 +54,8 @@ class APIKey(Base):
     __table_args__ = (
         Index('idx_api_keys_user_id', 'user_id'),
         Index('idx_api_keys_key_hash', 'key_hash'),
+        Index('idx_api_keys_key_lookup_hash', 'key_lookup_hash', unique=True),
+        Index('idx_api_keys_key_prefix', 'key_prefix'),
         Index('idx_api_keys_is_active', 'is_active'),
     )
 
@@ -79,8 +82,13 @@ class GoldenPathMetadata(Base):
 
     __table_args__ = (
         Index('idx_golden_paths_namespace_name', 'namespace', 'name'),
+        # One row per exact version; covers list/fetch lookups entirely
+        Index('idx_golden_paths_nnv', 'namespace', 'name', 'version', unique=True),
         Index('idx_golden_paths_owner', 'owner_user_id'),
         Index('idx_golden_paths_public', 'is_public'),
+        # Partial index for the public "recently updated" listing
+        Index('idx_golden_paths_public_recent', 'updated_at',
+              postgresql_where=text('is_public')),
     )
 
     def __repr__(self):
@@ -1,12 +1,35 @@
 """S3 registry operations for Golden Paths."""
 
-import boto3
+import asyncio
+import gzip
+import shutil
+import tempfile
+
+import aiobotocore.session
+from aiobotocore.config import AioConfig
 from botocore.exceptions import ClientError
-from typing import List, Dict, Optional
+from cachetools import TTLCache
+from typing import BinaryIO, Dict, Optional
+
+# Shared client configuration: a pool sized for the API's concurrency
+# (the default 10 causes "connection pool is full" under load), adaptive
+# retries for S3 throttling, and TCP keepalive to hold connections open.
+_S3_CONFIG = AioConfig(
+    max_pool_connections=64,
+    retries={'mode': 'adaptive', 'max_attempts': 3},
+    tcp_keepalive=True,
+)
 
 
 class GoldenPathRegistry:
-    """Manages Golden Path storage in S3."""
+    """
+    Manages Golden Path storage in S3.
+
+    All operations are natively async via aiobotocore; the long-lived S3
+    client is created in start() (called from the FastAPI lifespan) and
+    torn down in close(), so every request reuses established TLS
+    connections and the event loop is never blocked on S3 I/O.
+    """
 
     def __init__(self, bucket_name: str = "goldenpath-registry", region: str = "us-east-1"):
         """
@@ -17,44 +40,97 @@ class GoldenPathRegistry:
             region: AWS region
         """
         self.bucket_name = bucket_name
-        self.s3 = boto3.client('s3', region_name=region)
-
-    def create_path(
+        self.region = region
+        self._client = None
+        self._client_ctx = None
+
+        # Content caches keyed by "namespace:name:version". Pinned semver
+        # versions are immutable once uploaded, so they get a long TTL;
+        # "latest" can change under us and gets a short one.
+        self._immutable_cache: TTLCache = TTLCache(maxsize=2048, ttl=86400)
+        self._latest_cache: TTLCache = TTLCache(maxsize=512, ttl=30)
+        # ETag revalidation store for "latest": outlives _latest_cache so
+        # expired entries can be refreshed with a conditional GET (304, no
+        # body transfer) instead of a full download.
+        self._etag_cache: TTLCache = TTLCache(maxsize=512, ttl=3600)
+
+    async def start(self) -> None:
+        """Create the long-lived async S3 client (lifespan startup)."""
+        session = aiobotocore.session.get_session()
+        self._client_ctx = session.create_client(
+            's3', region_name=self.region, config=_S3_CONFIG
+        )
+        self._client = await self._client_ctx.__aenter__()
+
+    async def close(self) -> None:
+        """Tear down the S3 client and its connections (lifespan shutdown)."""
+        if self._client_ctx is not None:
+            await self._client_ctx.__aexit__(None, None, None)
+            self._client = None
+            self._client_ctx = None
+
+    def _invalidate(self, namespace: str, name: str, version: str) -> None:
+        """Drop cache entries made stale by a write to this path."""
+        cache_key = f"{namespace}:{name}:{version}"
+        self._immutable_cache.pop(cache_key, None)
+        self._latest_cache.pop(cache_key, None)
+        # "latest" for this path may now resolve differently
+        self._latest_cache.pop(f"{namespace}:{name}:latest", None)
+        self._etag_cache.pop(f"{namespace}:{name}:latest", None)
+
+    async def create_path(
         self,
         namespace: str,
         name: str,
         version: str,
-        content: bytes
+        fileobj: BinaryIO
     ) -> Dict:
         """
-        Upload Golden Path to S3.
+        Upload Golden Path to S3, streaming from a file-like object.
 
         Args:
             namespace: Namespace with @ prefix (e.g., "@goldenpathdev")
             name: Golden Path name (kebab-case)
             version: Semver version
-            content: File content as bytes
+            fileobj: Seekable binary file object with the content
 
         Returns:
             Success response with S3 location
         """
-        # Validate YAML frontmatter
-        if not content.startswith(b'---'):
+        # Validate YAML frontmatter by peeking at the first bytes only
+        head = fileobj.read(3)
+        fileobj.seek(0)
+        if head != b'---':
             return {
                 "success": False,
                 "error": "Invalid Golden Path: missing YAML frontmatter"
             }
 
+        # Markdown compresses 3-5x; storing gzip cuts S3 egress bytes and
+        # transfer time on every subsequent fetch. Compress in chunks
+        # through a spooled temp file so large uploads never sit in
+        # memory whole (small ones stay in the spool buffer), and do it
+        # in a worker thread — the CPU-bound deflate loop (plus any disk
+        # spill) would otherwise stall the event loop for the duration.
+        def _compress() -> tempfile.SpooledTemporaryFile:
+            spool = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+            with gzip.GzipFile(fileobj=spool, mode='wb', compresslevel=6) as gz:
+                shutil.copyfileobj(fileobj, gz, 64 * 1024)
+            spool.seek(0)
+            return spool
+
+        body = await asyncio.to_thread(_compress)
+
         # Construct S3 key
         s3_key = f"{namespace}/{name}/{version}.md"
 
         try:
-            # Upload to S3
-            self.s3.put_object(
+            await self._client.put_object(
                 Bucket=self.bucket_name,
                 Key=s3_key,
-                Body=content,
+                Body=body,
                 ContentType='text/markdown',
+                ContentEncoding='gzip',
                 Metadata={
                     'namespace': namespace,
                     'name': name,
@@ -62,6 +138,16 @@ class GoldenPathRegistry:
                 }
             )
 
+            # Update the LATEST pointer so fetch_path("latest") resolves in
+            # O(1) — one tiny GET — no matter how many versions accumulate
+            await self._client.put_object(
+                Bucket=self.bucket_name,
+                Key=f"{namespace}/{name}/LATEST",
+                Body=version.encode()
+            )
+
+            self._invalidate(namespace, name, version)
+
             return {
                 "success": True,
                 "namespace": namespace,
@@ -76,8 +162,10 @@ class GoldenPathRegistry:
                 "success": False,
                 "error": str(e)
             }
+        finally:
+            body.close()
 
-    def fetch_path(
+    async def fetch_path(
         self,
         namespace: str,
         name: str,
@@ -97,67 +185,116 @@ class GoldenPathRegistry:
         Raises:
             ClientError: If path not found
         """
+        cache = self._latest_cache if version == "latest" else self._immutable_cache
+        cache_key = f"{namespace}:{name}:{version}"
+
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        if version == "latest":
+            # Resolve via the LATEST pointer object, then fetch the pinned
+            # version — which is immutable and served from the long cache
+            resolved = await self._resolve_latest(namespace, name)
+            if resolved is not None:
+                result = await self.fetch_path(namespace, name, resolved)
+                self._latest_cache[cache_key] = result
+                return result
+            # No pointer (path predates the LATEST convention): fall back
+            # to the literal latest.md key with ETag revalidation below
+
         s3_key = f"{namespace}/{name}/{version}.md"
 
-        try:
-            response = self.s3.get_object(
-                Bucket=self.bucket_name,
-                Key=s3_key
-            )
-            content = response['Body'].read().decode('utf-8')
+        # For "latest", revalidate with a conditional GET when we still
+        # hold the last ETag: a 304 costs headers only, no body transfer.
+        get_kwargs = {'Bucket': self.bucket_name, 'Key': s3_key}
+        stale = None
+        if version == "latest":
+            etag_entry = self._etag_cache.get(cache_key)
+            if etag_entry is not None:
+                get_kwargs['IfNoneMatch'], stale = etag_entry
 
-            return {
+        try:
+            response = await self._client.get_object(**get_kwargs)
+            raw = await response['Body'].read()
+            # Objects uploaded before the gzip convention are stored raw
+            if response.get('ContentEncoding') == 'gzip':
+                raw = gzip.decompress(raw)
+            content = raw.decode('utf-8')
+
+            result = {
                 "namespace": namespace,
                 "name": name,
                 "version": version,
                 "content": content,
                 "last_modified": response['LastModified'].isoformat()
             }
+            cache[cache_key] = result
+            if version == "latest":
+                self._etag_cache[cache_key] = (response['ETag'], result)
+            return result
 
-        except self.s3.exceptions.NoSuchKey:
+        except self._client.exceptions.NoSuchKey:
             raise ClientError(
                 {'Error': {'Code': 'NoSuchKey', 'Message': 'Not found'}},
                 'GetObject'
             )
-
-    def list_paths(self, namespace: Optional[str] = None) -> List[Dict]:
-        """
-        List Golden Paths in registry.
-
-        Args:
-            namespace: Optional namespace filter
-
-        Returns:
-            List of Golden Path metadata
-        """
-        prefix = namespace if namespace else ""
-
+        except ClientError as e:
+            if (
+                stale is not None
+                and e.response['ResponseMetadata']['HTTPStatusCode'] == 304
+            ):
+                # Not modified: our cached copy is still current
+                cache[cache_key] = stale
+                return stale
+            raise
+
+    async def _resolve_latest(self, namespace: str, name: str) -> Optional[str]:
+        """Read the LATEST pointer object; None if this path has none."""
         try:
-            response = self.s3.list_objects_v2(
+            response = await self._client.get_object(
                 Bucket=self.bucket_name,
-                Prefix=prefix
+                Key=f"{namespace}/{name}/LATEST"
             )
+            return (await response['Body'].read()).decode('utf-8').strip()
+        except self._client.exceptions.NoSuchKey:
+            return None
 
-            paths = []
-            for obj in response.get('Contents', []):
-                key = obj['Key']
-                if key.endswith('.md'):
-                    # Parse key: namespace/name/version.md
-                    parts = key.split('/')
-                    if len(parts) >= 3:
-                        paths.append({
-                            "namespace": parts[0],
-                            "name": parts[1],
-                            "version": parts[2].replace('.md', ''),
-                            "last_modified": obj['LastModified'].isoformat()
-                        })
-
-            return paths
+    async def _repoint_latest(self, namespace: str, name: str, deleted_version: str) -> None:
+        """Fix the LATEST pointer after the version it references is deleted.
 
-        except ClientError as e:
-            raise e
+        Repoints to the most recently uploaded surviving version, or
+        removes the pointer when none remain so it can't dangle.
+        """
+        if await self._resolve_latest(namespace, name) != deleted_version:
+            return
+
+        paginator = self._client.get_paginator('list_objects_v2')
+        newest = None
+        async for page in paginator.paginate(
+            Bucket=self.bucket_name,
+            Prefix=f"{namespace}/{name}/"
+        ):
+            for obj in page.get('Contents', []):
+                if not obj['Key'].endswith('.md'):
+                    continue
+                if newest is None or obj['LastModified'] > newest[0]:
+                    newest = (obj['LastModified'], obj['Key'])
+
+        pointer_key = f"{namespace}/{name}/LATEST"
+        if newest is None:
+            await self._client.delete_object(
+                Bucket=self.bucket_name, Key=pointer_key
+            )
+        else:
+            surviving = newest[1].rsplit('/', 1)[1][:-3]
+            await self._client.put_object(
+                Bucket=self.bucket_name,
+                Key=pointer_key,
+                Body=surviving.encode()
+            )
 
-    def delete_path(
+    async def delete_path(
         self,
         namespace: str,
         name: str,
@@ -177,11 +314,16 @@ class GoldenPathRegistry:
         s3_key = f"{namespace}/{name}/{version}.md"
 
         try:
-            self.s3.delete_object(
+            await self._client.delete_object(
                 Bucket=self.bucket_name,
                 Key=s3_key
             )
 
+            # Keep the LATEST pointer from dangling at the deleted key
+            await self._repoint_latest(namespace, name, version)
+
+            self._invalidate(namespace, name, version)
+
             return {
                 "success": True,
                 "namespace": namespace,
@@ -195,23 +337,3 @@ class GoldenPathRegistry:
                 "success": False,
                 "error": str(e)
             }
-
-    def search_paths(self, query: str) -> List[Dict]:
-        """
-        Search Golden Paths by name or namespace.
-
-        Args:
-            query: Search query
-
-        Returns:
-            List of matching Golden Paths
-        """
-        # Simple implementation: list all and filter
-        all_paths = self.list_paths()
-        query_lower = query.lower()
-
-        return [
-            path for path in all_paths
-            if query_lower in path['name'].lower()
-            or query_lower in path['namespace'].lower()
-        ]
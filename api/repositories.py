@@ -1,12 +1,50 @@
 """Repository pattern for database operations."""
-import secrets
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
 import bcrypt
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional, Tuple
-from sqlalchemy import select, update, delete
+from sqlalchemy import String, bindparam, case, lambda_stmt, select, update, delete, or_, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from api.models import User, APIKey
+from api.models import User, APIKey, GoldenPathMetadata
+
+_UTC = timezone.utc
+
+# Server-side pepper for the deterministic key-lookup hash. Not a secret
+# store: it only keeps the indexed column from being a bare hash of the key.
+_KEY_PEPPER = os.getenv("API_KEY_PEPPER", "goldenpath-dev-pepper").encode()
+
+
+def _key_lookup_hash(api_key: str) -> str:
+    """HMAC-SHA256 of an API key: fast, deterministic, safe to index."""
+    return hmac.new(_KEY_PEPPER, api_key.encode(), hashlib.sha256).hexdigest()
+
+
+# Debounced last_used timestamps (key_id -> pending value). Successful
+# verifications record here instead of writing per request; a background
+# task in api.main flushes the batch periodically.
+_pending_last_used: dict = {}
+
+
+async def flush_last_used(db: AsyncSession) -> None:
+    """Flush debounced last_used timestamps in one batched UPDATE."""
+    if not _pending_last_used:
+        return
+    # No awaits between copy and clear, so nothing queued is lost
+    pending = dict(_pending_last_used)
+    _pending_last_used.clear()
+
+    await db.execute(
+        update(APIKey)
+        .where(APIKey.key_id.in_(pending))
+        .values(last_used=case(pending, value=APIKey.key_id))
+    )
+    await db.commit()
 
 
 class UserRepository:
@@ -17,24 +55,36 @@ class UserRepository:
 
     async def get_by_id(self, user_id: str) -> Optional[User]:
         """Get user by ID."""
-        result = await self.db.execute(
-            select(User).where(User.user_id == user_id)
+        # lambda_stmt: statement construction and compilation happen
+        # once; later calls only swap the tracked closure parameter
+        stmt = lambda_stmt(
+            lambda: select(User).where(User.user_id == user_id).limit(1)
         )
-        return result.scalar_one_or_none()
+        result = await self.db.execute(stmt)
+        return result.scalars().first()
 
     async def get_by_email(self, email: str) -> Optional[User]:
         """Get user by email."""
-        result = await self.db.execute(
-            select(User).where(User.email == email)
+        stmt = lambda_stmt(
+            lambda: select(User).where(User.email == email).limit(1)
         )
-        return result.scalar_one_or_none()
+        result = await self.db.execute(stmt)
+        return result.scalars().first()
 
     async def get_by_namespace(self, namespace: str) -> Optional[User]:
         """Get user by namespace."""
+        stmt = lambda_stmt(
+            lambda: select(User).where(User.namespace == namespace).limit(1)
+        )
+        result = await self.db.execute(stmt)
+        return result.scalars().first()
+
+    async def list_namespaces_with_prefix(self, prefix: str) -> List[str]:
+        """All namespaces starting with prefix (for uniqueness suffixing)."""
         result = await self.db.execute(
-            select(User).where(User.namespace == namespace)
+            select(User.namespace).where(User.namespace.like(f"{prefix}%"))
         )
-        return result.scalar_one_or_none()
+        return [row[0] for row in result]
 
     async def create(
         self,
@@ -59,10 +109,41 @@ class UserRepository:
             auth_provider=auth_provider,
         )
         self.db.add(user)
+        # No refresh needed: on 2.0 + asyncpg, server defaults (created_at
+        # etc.) come back via INSERT ... RETURNING in the same round trip
         await self.db.commit()
-        await self.db.refresh(user)
         return user
 
+    async def create_if_absent(
+        self,
+        user_id: str,
+        email: str,
+        namespace: str,
+        auth_provider: str,
+        email_verified: bool = False,
+        name: Optional[str] = None,
+    ) -> Optional[User]:
+        """
+        Insert a user atomically; return None if user_id already exists.
+
+        INSERT ... ON CONFLICT DO NOTHING RETURNING replaces the
+        SELECT-then-INSERT dance with one round trip. A clash on another
+        unique column (email, namespace) still raises IntegrityError.
+        """
+        stmt = pg_insert(User).values(
+            user_id=user_id,
+            email=email,
+            email_verified=email_verified,
+            name=name,
+            namespace=namespace,
+            auth_provider=auth_provider,
+        ).on_conflict_do_nothing(
+            index_elements=[User.user_id]
+        ).returning(User)
+        result = await self.db.execute(stmt)
+        await self.db.commit()
+        return result.scalar_one_or_none()
+
     async def get_by_cognito_username(self, cognito_username: str) -> Optional[User]:
         """
         Get user by Cognito username (sub claim from JWT).
@@ -114,27 +195,41 @@ class UserRepository:
         github_username: Optional[str] = None,
     ) -> Optional[User]:
         """Update user profile."""
-        # Build update dict with only provided values
-        update_data = {}
-        if name is not None:
-            update_data["name"] = name
-        if bio is not None:
-            update_data["bio"] = bio
-        if github_username is not None:
-            update_data["github_username"] = github_username
-
-        if not update_data:
+        if name is None and bio is None and github_username is None:
             # No updates provided, just return existing user
             return await self.get_by_id(user_id)
 
-        update_data["updated_at"] = datetime.utcnow()
-
-        await self.db.execute(
-            update(User).where(User.user_id == user_id).values(**update_data)
+        # One statement shape no matter which fields were provided:
+        # COALESCE(:param, column) keeps unset columns. Explicit
+        # bindparams (rather than inlining the Python values) keep None
+        # from compiling to a NULL literal, so every call really does
+        # reuse the same compiled SQL instead of one variant per
+        # None/non-None combination. RETURNING folds the follow-up
+        # SELECT into the UPDATE.
+        result = await self.db.execute(
+            update(User)
+            .where(User.user_id == user_id)
+            .values(
+                name=func.coalesce(bindparam("name", type_=String), User.name),
+                bio=func.coalesce(bindparam("bio", type_=String), User.bio),
+                github_username=func.coalesce(
+                    bindparam("github_username", type_=String),
+                    User.github_username,
+                ),
+                updated_at=func.now(),
+            )
+            .returning(User),
+            {"name": name, "bio": bio, "github_username": github_username},
         )
         await self.db.commit()
 
-        return await self.get_by_id(user_id)
+        # Evict the auth-layer user cache so the next authenticated
+        # request sees the new profile immediately
+        # Imported here to avoid a circular import (api.auth imports us)
+        from api.auth import invalidate_user_cache
+        invalidate_user_cache(user_id)
+
+        return result.scalar_one_or_none()
 
 
 class APIKeyRepository:
@@ -145,26 +240,46 @@ class APIKeyRepository:
 
     async def get_by_id(self, key_id: str) -> Optional[APIKey]:
         """Get API key by ID."""
-        result = await self.db.execute(
-            select(APIKey).where(APIKey.key_id == key_id)
+        stmt = lambda_stmt(
+            lambda: select(APIKey).where(APIKey.key_id == key_id).limit(1)
         )
-        return result.scalar_one_or_none()
+        result = await self.db.execute(stmt)
+        return result.scalars().first()
 
     async def get_by_hash(self, key_hash: str) -> Optional[APIKey]:
         """Get API key by hash."""
-        result = await self.db.execute(
-            select(APIKey).where(APIKey.key_hash == key_hash)
+        stmt = lambda_stmt(
+            lambda: select(APIKey).where(APIKey.key_hash == key_hash).limit(1)
         )
-        return result.scalar_one_or_none()
+        result = await self.db.execute(stmt)
+        return result.scalars().first()
 
-    async def list_by_user(self, user_id: str) -> List[APIKey]:
-        """List all API keys for a user."""
+    async def list_by_user(
+        self, user_id: str, limit: int = 50, offset: int = 0
+    ) -> Tuple[List[APIKey], int]:
+        """
+        List one page of a user's API keys plus the total count.
+
+        COUNT(*) OVER() piggybacks the total onto the same query, so
+        rows and count cost a single round trip.
+        """
         result = await self.db.execute(
-            select(APIKey)
+            select(APIKey, func.count().over().label("total"))
             .where(APIKey.user_id == user_id)
             .order_by(APIKey.created_at.desc())
+            .limit(limit)
+            .offset(offset)
         )
-        return list(result.scalars().all())
+        rows = result.all()
+        if not rows:
+            # No rows means no window total either — the offset may just
+            # be past the end, so count separately to keep pagination
+            # metadata honest
+            total = await self.db.scalar(
+                select(func.count()).where(APIKey.user_id == user_id)
+            )
+            return [], total or 0
+        return [row[0] for row in rows], rows[0].total
 
     async def create(
         self,
@@ -186,11 +301,18 @@ class APIKeyRepository:
             Tuple of (plaintext_api_key, api_key_record)
             WARNING: The plaintext key is only returned once!
         """
-        # Generate API key
-        api_key = f"gp_live_{secrets.token_urlsafe(32)}"
-
-        # Hash the key for storage
-        key_hash = bcrypt.hashpw(api_key.encode(), bcrypt.gensalt()).decode()
+        # Generate the key and its ID from one getrandom() syscall
+        # (equivalent output to two secrets.token_urlsafe calls)
+        raw = os.urandom(48)
+        api_key = f"gp_live_{base64.urlsafe_b64encode(raw[:32]).rstrip(b'=').decode()}"
+        key_id = f"key_{base64.urlsafe_b64encode(raw[32:]).rstrip(b'=').decode()}"
+
+        # Hash the key for storage. Keys are machine-generated with 256
+        # bits of entropy, so a peppered HMAC-SHA256 (~1us) gives the same
+        # practical security as bcrypt's ~100ms KDF — cost factors exist
+        # to slow down guessing of low-entropy human passwords, which
+        # these are not.
+        key_hash = _key_lookup_hash(api_key)
 
         # Create prefix for display
         key_prefix = api_key[:16] + "..."
@@ -199,24 +321,27 @@ class APIKeyRepository:
         if scopes is None:
             scopes = ["read", "write"]
 
-        # Calculate expiration (use timezone-aware datetime to match DB timestamps)
-        from datetime import timedelta, timezone
-        expires_at = datetime.now(timezone.utc) + timedelta(days=expires_days)
+        # Expiration is computed against the DB clock: now() plus a bound
+        # interval, so no Python datetime is allocated and the statement
+        # shape stays constant. (Don't read expires_at back off this
+        # record post-commit — it holds the SQL expression client-side.)
+        expires_at = func.now() + timedelta(days=expires_days)
 
         # Create record
         key_record = APIKey(
-            key_id=f"key_{secrets.token_urlsafe(16)}",
+            key_id=key_id,
             user_id=user_id,
             name=name,
             key_hash=key_hash,
+            key_lookup_hash=_key_lookup_hash(api_key),
             key_prefix=key_prefix,
             scopes=scopes,
             expires_at=expires_at,
         )
 
         self.db.add(key_record)
+        # Server defaults arrive via INSERT ... RETURNING; no refresh
         await self.db.commit()
-        await self.db.refresh(key_record)
 
         return api_key, key_record
 
@@ -226,31 +351,64 @@ class APIKeyRepository:
         Also updates last_used timestamp.
         Returns None if key is invalid, inactive, or expired.
         """
-        # Get all active keys (we need to check hash against all)
+        result = await self.verify_key_with_user(api_key)
+        return result[0] if result else None
+
+    async def verify_key_with_user(self, api_key: str) -> Optional[Tuple[APIKey, User]]:
+        """
+        Verify an API key and return (key_record, user) if valid.
+
+        Joins the owning user into the same query so authentication costs
+        a single DB round trip instead of a verify + get_by_id pair.
+        Also updates last_used timestamp.
+        Returns None if key is invalid, inactive, or expired.
+        """
+        # Direct lookup via the unique HMAC index: exactly one row and one
+        # bcrypt check, instead of scanning candidate keys
         result = await self.db.execute(
-            select(APIKey).where(APIKey.is_active == True)
+            select(APIKey, User)
+            .join(User, User.user_id == APIKey.user_id)
+            .where(APIKey.key_lookup_hash == _key_lookup_hash(api_key))
+            .where(APIKey.is_active == True)
         )
-        keys = result.scalars().all()
-
-        # Check each key's hash
-        for key_record in keys:
-            if bcrypt.checkpw(api_key.encode(), key_record.key_hash.encode()):
+        rows = result.all()
+
+        if not rows:
+            # Legacy keys created before key_lookup_hash existed: narrow
+            # by the indexed display prefix before the bcrypt loop
+            key_prefix = api_key[:16] + "..."
+            result = await self.db.execute(
+                select(APIKey, User)
+                .join(User, User.user_id == APIKey.user_id)
+                .where(APIKey.key_lookup_hash.is_(None))
+                .where(APIKey.key_prefix == key_prefix)
+                .where(APIKey.is_active == True)
+            )
+            rows = result.all()
+
+        # Check each key's hash. New keys store a peppered HMAC (constant-
+        # time compare, ~1us); keys from before the switch still carry a
+        # bcrypt hash ("$2..." prefix) and get checkpw in a worker thread.
+        presented = _key_lookup_hash(api_key)
+        for key_record, user in rows:
+            stored = key_record.key_hash
+            if stored.startswith("$2"):
+                matched = await asyncio.to_thread(
+                    bcrypt.checkpw, api_key.encode(), stored.encode()
+                )
+            else:
+                matched = hmac.compare_digest(stored, presented)
+            if matched:
                 # Check if key has expired (use timezone-aware datetime)
-                from datetime import timezone
-                now = datetime.now(timezone.utc)
+                now = datetime.now(_UTC)
                 if key_record.expires_at and key_record.expires_at < now:
                     # Key has expired - return None without updating last_used
                     return None
 
-                # Update last_used timestamp
-                await self.db.execute(
-                    update(APIKey)
-                    .where(APIKey.key_id == key_record.key_id)
-                    .values(last_used=now)
-                )
-                await self.db.commit()
-                await self.db.refresh(key_record)
-                return key_record
+                # Record last_used for the debounced batch flush instead
+                # of paying an UPDATE + commit on every authentication
+                _pending_last_used[key_record.key_id] = now
+                return key_record, user
 
         return None
 
@@ -262,7 +420,11 @@ class APIKeyRepository:
             .where(APIKey.user_id == user_id)
         )
         await self.db.commit()
-        return result.rowcount > 0
+
+        if result.rowcount > 0:
+            self._invalidate_cache(key_id)
+            return True
+        return False
 
     async def deactivate(self, key_id: str, user_id: str) -> bool:
         """Deactivate an API key instead of deleting it."""
@@ -273,4 +435,120 @@ class APIKeyRepository:
             .values(is_active=False)
         )
         await self.db.commit()
-        return result.rowcount > 0
+
+        if result.rowcount > 0:
+            self._invalidate_cache(key_id)
+            return True
+        return False
+
+    @staticmethod
+    def _invalidate_cache(key_id: str) -> None:
+        """Evict the in-process auth cache entry for a mutated key."""
+        # Imported here to avoid a circular import (api.auth imports us)
+        from api.auth import invalidate_api_key_cache
+        invalidate_api_key_cache(key_id)
+
+
+class GoldenPathMetadataRepository:
+    """
+    Repository for Golden Path metadata.
+
+    S3 remains the source of truth for content; these rows exist so
+    queries like search can run against indexed Postgres columns instead
+    of scanning the bucket.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def upsert(
+        self,
+        namespace: str,
+        name: str,
+        version: str,
+        owner_user_id: Optional[str] = None,
+    ) -> None:
+        """Insert or refresh the metadata row for an uploaded path."""
+        stmt = pg_insert(GoldenPathMetadata).values(
+            path_id=f"{namespace}/{name}:{version}",
+            namespace=namespace,
+            name=name,
+            version=version,
+            owner_user_id=owner_user_id,
+        ).on_conflict_do_update(
+            index_elements=[GoldenPathMetadata.path_id],
+            set_={"updated_at": func.now()},
+        )
+        await self.db.execute(stmt)
+        await self.db.commit()
+
+    # Whitelisted sort columns for list_paths (API name -> ORM column)
+    _SORT_COLUMNS = {
+        "name": GoldenPathMetadata.name,
+        "namespace": GoldenPathMetadata.namespace,
+        "version": GoldenPathMetadata.version,
+        "last_modified": GoldenPathMetadata.updated_at,
+    }
+
+    async def list_paths(
+        self,
+        namespace: Optional[str] = None,
+        sort_by: str = "name",
+        limit: int = 50,
+        offset: int = 0,
+    ) -> Tuple[List[GoldenPathMetadata], int]:
+        """
+        List one page of path versions plus the total match count.
+
+        Sorting and pagination run in Postgres against indexed columns,
+        so a page costs O(per_page) instead of materializing and sorting
+        every row in Python.
+        """
+        column = self._SORT_COLUMNS.get(sort_by, GoldenPathMetadata.name)
+        order = column.desc() if sort_by == "last_modified" else column.asc()
+
+        stmt = select(GoldenPathMetadata)
+        count_stmt = select(func.count()).select_from(GoldenPathMetadata)
+        if namespace:
+            stmt = stmt.where(GoldenPathMetadata.namespace == namespace)
+            count_stmt = count_stmt.where(
+                GoldenPathMetadata.namespace == namespace
+            )
+
+        rows = await self.db.execute(
+            stmt.order_by(order).limit(limit).offset(offset)
+        )
+        total = await self.db.execute(count_stmt)
+        return list(rows.scalars().all()), total.scalar_one()
+
+    async def delete(self, namespace: str, name: str, version: str) -> None:
+        """Remove the metadata row for a deleted path."""
+        await self.db.execute(
+            delete(GoldenPathMetadata)
+            .where(GoldenPathMetadata.namespace == namespace)
+            .where(GoldenPathMetadata.name == name)
+            .where(GoldenPathMetadata.version == version)
+        )
+        await self.db.commit()
+
+    async def search(self, query: str, limit: int = 50) -> List[GoldenPathMetadata]:
+        """
+        Search public paths by name or namespace substring.
+
+        Indexed ILIKE query ordered by popularity — O(log N) against
+        Postgres instead of an O(N) full-bucket listing.
+        """
+        pattern = f"%{query}%"
+        result = await self.db.execute(
+            select(GoldenPathMetadata)
+            .where(GoldenPathMetadata.is_public == True)
+            .where(
+                or_(
+                    GoldenPathMetadata.name.ilike(pattern),
+                    GoldenPathMetadata.namespace.ilike(pattern),
+                )
+            )
+            .order_by(GoldenPathMetadata.download_count.desc())
+            .limit(limit)
+        )
+        return list(result.scalars().all())
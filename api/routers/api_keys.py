@@ -7,10 +7,10 @@ from api.auth import get_current_user_from_jwt  # Changed from API key to JWT au
 from api.repositories import APIKeyRepository
 from api.models import User
 from api.schemas import (
+    API_KEY_LIST_ADAPTER,
     APIKeyCreateRequest,
     APIKeyCreateResponse,
     APIKeyListResponse,
-    APIKeyResponse,
     ErrorResponse,
 )
 
@@ -19,20 +19,27 @@ router = APIRouter(prefix="/api/v1/users/me/api-keys", tags=["api-keys"])
 
 @router.get("", response_model=APIKeyListResponse)
 async def list_api_keys(
+    limit: int = 50,
+    offset: int = 0,
     current_user: User = Depends(get_current_user_from_jwt),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    List all API keys for the current user.
+    List API keys for the current user (paginated).
 
     Requires: Valid JWT token in Authorization header (dashboard authentication)
     """
+    limit = min(max(1, limit), 200)
+    offset = max(0, offset)
+
     api_key_repo = APIKeyRepository(db)
-    keys = await api_key_repo.list_by_user(current_user.user_id)
+    keys, total = await api_key_repo.list_by_user(
+        current_user.user_id, limit=limit, offset=offset
+    )
 
     return APIKeyListResponse(
-        api_keys=[APIKeyResponse.model_validate(key) for key in keys],
-        total=len(keys)
+        api_keys=API_KEY_LIST_ADAPTER.validate_python(keys, from_attributes=True),
+        total=total
     )
 
 
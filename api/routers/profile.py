@@ -6,7 +6,12 @@ from api.database import get_db
 from api.auth import get_current_user_from_jwt
 from api.repositories import UserRepository, APIKeyRepository
 from api.models import User
-from api.schemas import UserResponse, UserUpdateRequest, APIKeyListResponse, APIKeyResponse
+from api.schemas import (
+    API_KEY_LIST_ADAPTER,
+    APIKeyListResponse,
+    UserResponse,
+    UserUpdateRequest,
+)
 
 router = APIRouter(prefix="/api/v1/users/me", tags=["profile"])
 
@@ -50,20 +55,27 @@ async def update_current_user_profile(
 
 @router.get("/api-keys", response_model=APIKeyListResponse)
 async def list_my_api_keys(
+    limit: int = 50,
+    offset: int = 0,
     current_user: User = Depends(get_current_user_from_jwt),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    List all API keys for the current user.
+    List API keys for the current user (paginated).
 
     This endpoint is for the web dashboard to manage API keys.
 
     Requires: Valid Cognito JWT token in Authorization header
     """
+    limit = min(max(1, limit), 200)
+    offset = max(0, offset)
+
     api_key_repo = APIKeyRepository(db)
-    keys = await api_key_repo.list_by_user(current_user.user_id)
+    keys, total = await api_key_repo.list_by_user(
+        current_user.user_id, limit=limit, offset=offset
+    )
 
     return APIKeyListResponse(
-        api_keys=[APIKeyResponse.model_validate(key) for key in keys],
-        total=len(keys)
+        api_keys=API_KEY_LIST_ADAPTER.validate_python(keys, from_attributes=True),
+        total=total
     )
@@ -1,5 +1,6 @@
 """User management API endpoints."""
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.database import get_db
@@ -17,12 +18,14 @@ from api.schemas import (
 router = APIRouter(prefix="/api/v1/users", tags=["users"])
 
 
+# Strips separator characters from the email local part in one pass
+_NS_TABLE = str.maketrans('', '', '._-')
+
+
 def generate_namespace_from_email(email: str) -> str:
     """Generate a namespace from email (e.g., user@example.com -> @user)."""
-    username = email.split("@")[0]
-    # Clean up the username
-    username = username.replace(".", "").replace("_", "").replace("-", "").lower()
-    return f"@{username}"
+    username = email.split("@", 1)[0]
+    return f"@{username.translate(_NS_TABLE).lower()}"
 
 
 @router.post("/register", response_model=UserRegisterResponse, status_code=201)
@@ -39,12 +42,42 @@ async def register_user(
     """
     user_repo = UserRepository(db)
 
-    # Check if user already exists
-    existing_user = await user_repo.get_by_id(request.user_id)
-    if existing_user:
+    # Generate namespace; resolve collisions against one prefix query
+    # instead of a SELECT per attempted suffix
+    base_namespace = generate_namespace_from_email(request.email)
+    taken = set(await user_repo.list_namespaces_with_prefix(base_namespace))
+    namespace = base_namespace
+    counter = 1
+    while namespace in taken:
+        namespace = f"{base_namespace}{counter}"
+        counter += 1
+
+    # Atomic insert replaces the exists/email pre-check SELECTs: the
+    # common new-user path is one round trip, and the constraints decide
+    # instead of racy read-then-write checks
+    try:
+        user = await user_repo.create_if_absent(
+            user_id=request.user_id,
+            email=request.email,
+            email_verified=request.email_verified,
+            name=request.name,
+            namespace=namespace,
+            auth_provider=request.auth_provider,
+        )
+    except IntegrityError:
+        # user_id was free, so the clash is the unique email (the
+        # namespace was suffixed against live data just above)
+        await db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="Email already in use"
+        )
+
+    if user is None:
         # User already registered, return existing data
+        existing_user = await user_repo.get_by_id(request.user_id)
         api_key_repo = APIKeyRepository(db)
-        keys = await api_key_repo.list_by_user(existing_user.user_id)
+        keys, _ = await api_key_repo.list_by_user(existing_user.user_id, limit=1)
 
         return UserRegisterResponse(
             user_id=existing_user.user_id,
@@ -56,34 +89,6 @@ async def register_user(
             message="User already registered"
         )
 
-    # Check if email already in use
-    existing_email = await user_repo.get_by_email(request.email)
-    if existing_email:
-        raise HTTPException(
-            status_code=400,
-            detail="Email already in use"
-        )
-
-    # Generate namespace
-    base_namespace = generate_namespace_from_email(request.email)
-    namespace = base_namespace
-    counter = 1
-
-    # Ensure namespace is unique
-    while await user_repo.get_by_namespace(namespace):
-        namespace = f"{base_namespace}{counter}"
-        counter += 1
-
-    # Create user
-    user = await user_repo.create(
-        user_id=request.user_id,
-        email=request.email,
-        email_verified=request.email_verified,
-        name=request.name,
-        namespace=namespace,
-        auth_provider=request.auth_provider,
-    )
-
     # Generate API key if email is verified
     default_api_key = None
     message = None
@@ -1,7 +1,7 @@
 """Pydantic schemas for API requests and responses."""
 from typing import Optional, List
 from datetime import datetime
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, TypeAdapter
 
 
 # User Schemas
@@ -92,6 +92,27 @@ class APIKeyListResponse(BaseModel):
     total: int
 
 
+# Compiled once at import; validates a whole ORM list in one
+# pydantic-core pass instead of per-instance model_validate calls
+API_KEY_LIST_ADAPTER = TypeAdapter(List[APIKeyResponse])
+
+
+# Golden Path Schemas
+class GoldenPathRef(BaseModel):
+    """Reference to a single Golden Path version."""
+    namespace: str
+    name: str
+    version: str = "latest"
+
+
+class BatchFetchRequest(BaseModel):
+    """Request body for fetching multiple Golden Paths in one call."""
+    paths: List[GoldenPathRef] = Field(
+        ..., min_length=1, max_length=128,
+        description="Paths to fetch (max 128 per request)"
+    )
+
+
 # Error Schemas
 class ErrorResponse(BaseModel):
     """Standard error response."""
@@ -1,5 +1,15 @@
 """Initialize database with tables."""
 import asyncio
+
+# Swap in uvloop's C event loop when available (same loop the API
+# serves under via uvicorn --loop uvloop); asyncio.run picks it up
+# through the installed policy
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
 from api.database import init_db
 
 async def main():